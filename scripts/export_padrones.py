@@ -12,31 +12,49 @@ Salida: CSV en outputs/padrones_[depto|all].csv con columnas:
 - nro_padron
 - depto_padron (texto "DeptoPadron")
 
-Nota: el proceso consulta el servicio en lotes de 1000 y evita duplicados en
-memoria. Descargar todos los padrones puede llevar bastante tiempo y memoria.
+Las filas salen en orden de OBJECTID (no ordenadas por departamento/padrón);
+ordenar el CSV después si hace falta.
+
+Nota: el proceso consulta el servicio en lotes de 1000 OBJECTID (varios
+lotes en paralelo) y evita duplicados en memoria. Descargar todos los
+padrones puede llevar bastante tiempo y memoria.
 """
 
 from __future__ import annotations
 
 import argparse
 import csv
+import itertools
+import operator
 import os
 import sys
 import time
-from typing import Dict, Iterable, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 
 BASE_URL = "https://web.snig.gub.uy/arcgisserver/rest/services/Uruguay/SNIG_Catastro_Dos/MapServer/1/query"
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "outputs")
 CHUNK_SIZE = 1000
 RETRY = 3
 SLEEP = 0.5
+MAX_WORKERS = 8  # páginas consultadas en paralelo
+PADRON_FIELDS = ("CodDepartamento", "NroPadron", "DeptoPadron", "codLocCat", "nomLocCat")
+OUT_FIELDS = ",".join(PADRON_FIELDS)
+WRITE_BATCH = 50000  # filas acumuladas por cada writerows()
+_padron_attrs = operator.itemgetter(*PADRON_FIELDS)
 
 SESSION = requests.Session()
 SESSION.headers.update({
-    "User-Agent": "snig-padrones-export/1.0 (+https://github.com/)"
+    "User-Agent": "snig-padrones-export/1.0 (+https://github.com/)",
+    # ArcGIS comprime JSON/GeoJSON con gzip (5-10x menos bytes); requests lo descomprime
+    "Accept-Encoding": "gzip, deflate",
 })
+# Pool de conexiones keep-alive compartido por los hilos de descarga
+# (los reintentos los maneja _post)
+SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=0))
 
 
 def _post(data: Dict[str, str]) -> Dict:
@@ -59,39 +77,52 @@ def _post(data: Dict[str, str]) -> Dict:
     raise RuntimeError(last_exc)  # type: ignore[misc]
 
 
-def fetch_padrones(where: str) -> Iterable[Tuple[int, int, str]]:
-    offset = 0
-    seen: Set[Tuple[int, int]] = set()
-    while True:
-        payload = {
-            "where": where,
-            "outFields": "CodDepartamento,NroPadron,DeptoPadron,codLocCat,nomLocCat",
-            "f": "json",
-            "returnGeometry": "false",
-            "resultOffset": str(offset),
-            "resultRecordCount": str(CHUNK_SIZE),
-            "orderByFields": "CodDepartamento ASC,NroPadron ASC",
-            "returnDistinctValues": "false",
-        }
-        data = _post(payload)
-        features = data.get("features", [])
-        if not features:
-            break
-        for feat in features:
-            attrs: Dict = feat.get("attributes", {})
-            cod = attrs.get("CodDepartamento")
-            nro = attrs.get("NroPadron")
-            depto_padron = attrs.get("DeptoPadron", "")
-            if cod is None or nro is None:
-                continue
-            key = (int(cod), int(nro))
-            if key in seen:
-                continue
-            seen.add(key)
-            yield int(cod), int(nro), str(depto_padron or ""), str(attrs.get("codLocCat", "")), str(attrs.get("nomLocCat", ""))
-        offset += CHUNK_SIZE
-        if not data.get("exceededTransferLimit") and len(features) < CHUNK_SIZE:
-            break
+def query_padron_ids(where: str) -> List[int]:
+    data = _post({"where": where, "returnIdsOnly": "true", "f": "json"})
+    ids = data.get("objectIds") or []
+    ids.sort()
+    return ids
+
+
+def _fetch_batch(ids: List[int]) -> List[Dict]:
+    payload = {
+        "objectIds": ",".join(map(str, ids)),
+        "outFields": OUT_FIELDS,
+        "f": "json",
+        "returnGeometry": "false",
+        "returnDistinctValues": "false",
+    }
+    return _post(payload).get("features", [])
+
+
+def _to_str(value) -> str:
+    return "" if value is None else str(value)
+
+
+def fetch_padrones(where: str) -> Iterable[Tuple[int, int, str, str, str]]:
+    # Paginar por lotes de OBJECTID en vez de resultOffset: el servidor no
+    # tiene que re-ejecutar la consulta y saltear N filas en cada página
+    ids = query_padron_ids(where)
+    # (cod, nro) empaquetado en un único int: mucha menos memoria que tuplas
+    seen: Set[int] = set()
+    seen_add = seen.add
+    batches = [ids[i:i+CHUNK_SIZE] for i in range(0, len(ids), CHUNK_SIZE)]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # map() devuelve los lotes en orden aunque se descarguen en paralelo
+        for features in executor.map(_fetch_batch, batches):
+            for feat in features:
+                try:
+                    cod, nro, depto_padron, cod_loc, nom_loc = _padron_attrs(feat["attributes"])
+                except KeyError:
+                    continue
+                if cod is None or nro is None:
+                    continue
+                cod, nro = int(cod), int(nro)
+                key = (cod << 32) | nro
+                if key in seen:
+                    continue
+                seen_add(key)
+                yield cod, nro, _to_str(depto_padron), _to_str(cod_loc), _to_str(nom_loc)
 
 
 def main(argv: Iterable[str] | None = None) -> int:
@@ -118,26 +149,24 @@ def main(argv: Iterable[str] | None = None) -> int:
         suffix_parts.append(f"loc_{args.localidad}")
 
     suffix = "_".join(suffix_parts) if suffix_parts else "all"
-    if args.depto is not None:
-        if not (1 <= args.depto <= 19):
-            print("--depto debe estar entre 1 y 19", file=sys.stderr)
-            return 2
-        where += f" AND CodDepartamento = {args.depto}"
-        suffix = f"depto_{args.depto}"
 
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     out_path = os.path.join(OUTPUT_DIR, f"padrones_{suffix}.csv")
     print(f"Consultando padrones ({suffix})...")
 
     count = 0
-    with open(out_path, "w", newline="", encoding="utf-8") as f:
+    rows = iter(fetch_padrones(where))
+    with open(out_path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
         writer = csv.writer(f)
         writer.writerow(["cod_departamento", "nro_padron", "depto_padron", "cod_localidad", "nombre_localidad"])
-        for cod, nro, depto_padron, cod_loc, nom_loc in fetch_padrones(where):
-            writer.writerow([cod, nro, depto_padron, cod_loc, nom_loc])
-            count += 1
-            if count % 5000 == 0:
-                print(f"  {count} registros exportados...")
+        while True:
+            batch = list(itertools.islice(rows, WRITE_BATCH))
+            if not batch:
+                break
+            # un solo writerows por lote: el bucle por fila corre en C
+            writer.writerows(batch)
+            count += len(batch)
+            print(f"  {count} registros exportados...")
 
     print(f"Listo. Se exportaron {count} padrones a {out_path}")
     return 0
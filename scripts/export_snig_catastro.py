@@ -12,15 +12,22 @@ Requisitos:
   pip install -r requirements.txt
 """
 import csv
-import json
 import math
 import os
+import shutil
+import sqlite3
 import sys
-from typing import Dict, List, Any
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import closing
+from functools import lru_cache
+from typing import BinaryIO, Deque, Dict, Iterable, Iterator, List, Any, Optional, Tuple, Union
 import time
 import argparse
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 
 
 def _resolve_base_dir() -> str:
@@ -44,28 +51,38 @@ LAYERS = [
     (3, "tblLocalidadCatastral", "table"),
 ]
 
-SESSION = requests.Session()
-SESSION.headers.update({
-    "User-Agent": "snig-catastro-export/1.0 (+https://github.com/)"
-})
 TIMEOUT = 60
 CHUNK_SIZE = 1000  # coherente con MaxRecordCount: 1000
 RETRY = 3
 SLEEP_BETWEEN = 0.5
+MAX_WORKERS = 8  # chunks descargados en paralelo
+PROGRESS_DB_VERSION = 1  # subir al cambiar el esquema de progress.db
+COPY_BLOCK = 1 << 20  # bytes por lectura al unir chunks
+MIN_ID_RUN = 100  # OIDs consecutivos a partir de los cuales se consulta con BETWEEN
+
+SESSION = requests.Session()
+SESSION.headers.update({
+    "User-Agent": "snig-catastro-export/1.0 (+https://github.com/)",
+    # ArcGIS comprime JSON/GeoJSON con gzip (5-10x menos bytes); requests lo descomprime
+    "Accept-Encoding": "gzip, deflate",
+})
+# Pool de conexiones keep-alive compartido por los hilos de descarga
+# (los reintentos los maneja _get/_post)
+SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=0))
 
 
-def _get(url: str, params: Dict[str, Any]) -> requests.Response:
+def _get(url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """GET con reintentos; devuelve el cuerpo JSON ya decodificado."""
     last_exc = None
     for attempt in range(1, RETRY + 1):
         try:
             r = SESSION.get(url, params=params, timeout=TIMEOUT)
             r.raise_for_status()
+            data = orjson.loads(r.content)
             # ArcGIS devuelve JSON de error dentro de 200 OK; detectarlo
-            if r.headers.get("Content-Type", "").lower().startswith("application/json"):
-                data = r.json()
-                if isinstance(data, dict) and "error" in data:
-                    raise RuntimeError(f"Error REST: {data['error']}")
-            return r
+            if isinstance(data, dict) and "error" in data:
+                raise RuntimeError(f"Error REST: {data['error']}")
+            return data
         except Exception as e:
             last_exc = e
             if attempt < RETRY:
@@ -75,18 +92,17 @@ def _get(url: str, params: Dict[str, Any]) -> requests.Response:
     assert False, last_exc  # no se alcanza
 
 
-def _post(url: str, data: Dict[str, Any]) -> requests.Response:
+def _post(url: str, data: Dict[str, Any]) -> Dict[str, Any]:
     """POST con reintentos; útil para payloads grandes (evita límites de URL)."""
     last_exc = None
     for attempt in range(1, RETRY + 1):
         try:
             r = SESSION.post(url, data=data, timeout=TIMEOUT)
             r.raise_for_status()
-            if r.headers.get("Content-Type", "").lower().startswith("application/json"):
-                d = r.json()
-                if isinstance(d, dict) and "error" in d:
-                    raise RuntimeError(f"Error REST: {d['error']}")
-            return r
+            d = orjson.loads(r.content)
+            if isinstance(d, dict) and "error" in d:
+                raise RuntimeError(f"Error REST: {d['error']}")
+            return d
         except Exception as e:
             last_exc = e
             if attempt < RETRY:
@@ -96,16 +112,34 @@ def _post(url: str, data: Dict[str, Any]) -> requests.Response:
     assert False, last_exc
 
 
-def get_object_id_field(layer_id: int) -> str:
+@lru_cache(maxsize=None)
+def get_layer_info(layer_id: int) -> Dict[str, Any]:
+    """Metadatos de la capa (f=json): objectIdField, fields, etc.
+
+    Se consulta una sola vez por capa; no modificar el dict devuelto.
+    """
     url = f"{BASE_URL}/{layer_id}?f=json"
-    r = _get(url, params={})
-    data = r.json()
+    return _get(url, params={})
+
+
+@lru_cache(maxsize=None)
+def get_object_id_field(layer_id: int) -> str:
+    data = get_layer_info(layer_id)
     oid_field = data.get("objectIdField") or _find_oid_field(data.get("fields", []))
     if not oid_field:
         raise RuntimeError(f"No se pudo determinar el campo OID para la capa {layer_id}")
     return oid_field
 
 
+def get_field_names(layer_id: int) -> List[str]:
+    """Columnas de la capa en el orden declarado por el servicio."""
+    fields = get_layer_info(layer_id).get("fields") or []
+    names = [f["name"] for f in fields if f.get("name")]
+    if not names:
+        raise RuntimeError(f"No se pudo determinar el esquema de la capa {layer_id}")
+    return names
+
+
 def _find_oid_field(fields: List[Dict[str, Any]]) -> str:
     for f in fields:
         if f.get("type") == "esriFieldTypeOID":
@@ -120,8 +154,7 @@ def query_ids(layer_id: int, where: str = "1=1") -> List[int]:
         "returnIdsOnly": "true",
         "f": "json",
     }
-    r = _get(url, params)
-    data = r.json()
+    data = _get(url, params)
     ids = data.get("objectIds", [])
     if not isinstance(ids, list):
         raise RuntimeError(f"Respuesta inesperada de IDs para capa {layer_id}: {data}")
@@ -129,34 +162,57 @@ def query_ids(layer_id: int, where: str = "1=1") -> List[int]:
     return ids
 
 
+def _split_id_runs(ids: List[int], min_run: int) -> Tuple[List[Tuple[int, int]], List[int]]:
+    """Separa IDs ordenados en rangos contiguos de al menos min_run y IDs sueltos."""
+    runs: List[Tuple[int, int]] = []
+    sparse: List[int] = []
+    start = 0
+    for i in range(1, len(ids) + 1):
+        if i == len(ids) or ids[i] != ids[i - 1] + 1:
+            if i - start >= min_run:
+                runs.append((ids[start], ids[i - 1]))
+            else:
+                sparse.extend(ids[start:i])
+            start = i
+    return runs, sparse
+
+
 def query_features_by_ids(layer_id: int, ids: List[int], out_sr: int = 4326) -> Dict[str, Any]:
     url = f"{BASE_URL}/{layer_id}/query"
     data = {
-        "objectIds": ",".join(map(str, ids)),
         "outFields": "*",
-        "where": "1=1",
         "f": "geojson",
         "outSR": out_sr,
         "returnGeometry": "true",
     }
+    runs, sparse = _split_id_runs(ids, MIN_ID_RUN)
+    if runs:
+        # OIDs densos: un BETWEEN por rango en vez de listar cada ID
+        oid_field = get_object_id_field(layer_id)
+        clauses = [f"{oid_field} BETWEEN {start} AND {end}" for start, end in runs]
+        if sparse:
+            clauses.append(f"{oid_field} IN ({','.join(map(str, sparse))})")
+        data["where"] = " OR ".join(clauses)
+    else:
+        data["where"] = "1=1"
+        data["objectIds"] = ",".join(map(str, ids))
     # Usar POST para evitar límites de longitud de URL con listas grandes de IDs
-    r = _post(url, data)
-    return r.json()
+    return _post(url, data)
 
 
-def query_table_page(layer_id: int, offset: int, page_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+def query_table_page(layer_id: int, oid_field: str, after_oid: Optional[int] = None,
+                     page_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """Página de filas con OID mayor a after_oid (sin resultOffset)."""
     url = f"{BASE_URL}/{layer_id}/query"
     params = {
-        "where": "1=1",
+        "where": "1=1" if after_oid is None else f"{oid_field} > {after_oid}",
         "outFields": "*",
         "f": "json",
         "returnGeometry": "false",
-        "resultOffset": offset,
         "resultRecordCount": page_size,
-        "orderByFields": "OBJECTID ASC",
+        "orderByFields": f"{oid_field} ASC",
     }
-    r = _get(url, params)
-    return r.json()
+    return _get(url, params)
 
 
 def merge_feature_collections(collections: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -175,123 +231,321 @@ def merge_feature_collections(collections: List[Dict[str, Any]]) -> Dict[str, An
 
 def write_geojson(path: str, data: Dict[str, Any]):
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False)
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(data))
 
 
-def write_csv(path: str, rows: List[Dict[str, Any]]):
+def write_csv(path: str, fieldnames: List[str], pages: Iterable[List[Dict[str, Any]]]) -> int:
+    """Escribe las filas página a página; devuelve la cantidad de filas."""
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    if not rows:
-        # crear CSV vacío con cabeceras mínimas
-        with open(path, "w", newline="", encoding="utf-8") as f:
-            f.write("")
-        return
-    fieldnames = sorted({k for row in rows for k in row.keys()})
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        for rows in pages:
+            writer.writerows([row.get(c, "") for c in fieldnames] for row in rows)
+            count += len(rows)
+    return count
+
+
+def _fetch_features_json(layer_id: int, chunk_ids: List[int]) -> Tuple[bytes, int]:
+    """Descarga un chunk y serializa sus features una sola vez como array JSON."""
+    feats = query_features_by_ids(layer_id, chunk_ids, out_sr=4326).get("features", [])
+    return orjson.dumps(feats), len(feats)
+
+
+def _iter_chunks_in_order(layer_id: int, chunks: List[List[int]]) -> Iterator[Tuple[int, bytes, int]]:
+    """Descarga los chunks en paralelo y entrega (idx, array_json, features) en orden.
+
+    Como máximo 2 * MAX_WORKERS chunks quedan en vuelo/memoria a la vez.
+    """
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        pending: Deque[Tuple[int, Future]] = deque()
+        next_idx = 0
+        while next_idx < len(chunks) or pending:
+            while next_idx < len(chunks) and len(pending) < 2 * MAX_WORKERS:
+                future = executor.submit(_fetch_features_json, layer_id, chunks[next_idx])
+                pending.append((next_idx, future))
+                next_idx += 1
+            idx, future = pending.popleft()
+            array, count = future.result()
+            yield idx, array, count
+
+
+def _copy_array_body(src: BinaryIO, length: int, out: BinaryIO, first: bool) -> bool:
+    """Copia por bloques el contenido de un array JSON (sin corchetes) de src a out.
+
+    src debe estar posicionado al inicio del array, que ocupa length bytes.
+    Devuelve True si se escribió al menos una feature. La memoria usada es
+    O(COPY_BLOCK) sin importar el tamaño del chunk.
+    """
+    if length <= 2:  # "[]"
+        return False
+    src.read(1)  # '['
+    if not first:
+        out.write(b',')
+    remaining = length - 2  # sin el ']' final
+    while remaining:
+        block = src.read(min(COPY_BLOCK, remaining))
+        if not block:
+            raise RuntimeError("Chunk truncado al unir features")
+        out.write(block)
+        remaining -= len(block)
+    return True
+
+
+def _write_array_body(array: bytes, out: BinaryIO, first: bool) -> bool:
+    """Escribe el contenido de un array JSON en memoria sin copiarlo (sin corchetes)."""
+    body = memoryview(array)[1:-1]
+    if not body:
+        return False
+    if not first:
+        out.write(b',')
+    out.write(body)
+    return True
+
+
+def _write_feature_collection_stream(out_path: str,
+                                     sources: Iterable[Union[bytes, Tuple[BinaryIO, int]]]):
+    """Escribe un FeatureCollection concatenando arrays JSON de features.
+
+    Cada fuente es un array ya serializado, en memoria (bytes) o en disco
+    (archivo, largo): se copian sus bytes sin los corchetes externos, sin
+    volver a parsear ni serializar cada feature.
+    """
+    # Escribir a un .part y reemplazar recién al terminar: si falla un chunk,
+    # el export anterior queda intacto en vez de un GeoJSON truncado
+    part_path = out_path + ".part"
+    first = True
+    try:
+        with open(part_path, "wb") as out:
+            out.write(b'{"type":"FeatureCollection","features":[')
+            for src in sources:
+                if isinstance(src, bytes):
+                    wrote = _write_array_body(src, out, first)
+                else:
+                    wrote = _copy_array_body(src[0], src[1], out, first)
+                if wrote:
+                    first = False
+            out.write(b']}')
+    except BaseException:
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
+        raise
+    os.replace(part_path, out_path)
 
 
-def export_feature_layer(layer_id: int, out_name: str):
+def export_feature_layer(layer_id: int, out_name: str, resume: bool = False):
     print(f"Exportando capa {layer_id} -> {out_name}.geojson ...")
     oid_field = get_object_id_field(layer_id)
     ids = query_ids(layer_id)
+    out_path = os.path.join(OUTPUT_DIR, f"{out_name}.geojson")
     if not ids:
         print("  No hay registros.")
-        write_geojson(os.path.join(OUTPUT_DIR, f"{out_name}.geojson"), {
+        write_geojson(out_path, {
             "type": "FeatureCollection",
             "features": [],
         })
         return
 
-    # Preparar directorio temporal por capa
-    layer_tmp_dir = os.path.join(TMP_DIR, out_name)
-    os.makedirs(layer_tmp_dir, exist_ok=True)
-
     total = len(ids)
-    chunk_index = 0
-    written_features = 0
-    # Descargar por chunks a archivos temporales individuales
-    for i in range(0, total, CHUNK_SIZE):
-        chunk_ids = ids[i:i+CHUNK_SIZE]
-        chunk_path = os.path.join(layer_tmp_dir, f"chunk_{chunk_index}.geojson")
-        if os.path.exists(chunk_path):
-            # Reanudar: si el chunk ya existe, saltar
-            try:
-                with open(chunk_path, "r", encoding="utf-8") as cf:
-                    data = json.load(cf)
-                    count = len(data.get("features", []))
-                    written_features += count
-            except Exception:
-                # Si está corrupto, volver a descargar
-                pass
-            print(f"  Chunk {chunk_index} ya existe, saltando.")
-            chunk_index += 1
-            print(f"  Progreso estimado: {min(i+CHUNK_SIZE, total)}/{total} registros")
-            continue
-
-        fc = query_features_by_ids(layer_id, chunk_ids, out_sr=4326)
-        with open(chunk_path, "w", encoding="utf-8") as cf:
-            json.dump(fc, cf, ensure_ascii=False)
-        count = len(fc.get("features", []))
-        written_features += count
-        print(f"  Descargados {min(i+CHUNK_SIZE, total)}/{total} registros (chunk {chunk_index}, features: {count})")
-        chunk_index += 1
+    chunks = [ids[i:i+CHUNK_SIZE] for i in range(0, total, CHUNK_SIZE)]
+    if resume:
+        _export_feature_layer_resumable(layer_id, out_name, chunks, out_path)
+        return
 
-    # Unir chunks en un único GeoJSON final
-    out_path = os.path.join(OUTPUT_DIR, f"{out_name}.geojson")
-    print("  Uniendo chunks en archivo final...")
-    first_feature = True
+    # Escribir directo al archivo final, en orden de chunk, sin temporales
     total_features = 0
-    with open(out_path, "w", encoding="utf-8") as out:
-        out.write('{"type":"FeatureCollection","features":[')
-        for idx in range(chunk_index):
-            chunk_path = os.path.join(layer_tmp_dir, f"chunk_{idx}.geojson")
-            if not os.path.exists(chunk_path):
-                continue
-            with open(chunk_path, "r", encoding="utf-8") as cf:
-                data = json.load(cf)
-                feats = data.get("features", [])
-                for feat in feats:
-                    if not first_feature:
-                        out.write(',')
-                    out.write(json.dumps(feat, ensure_ascii=False))
-                    first_feature = False
-                    total_features += 1
-        out.write(']}')
+
+    def sources():
+        nonlocal total_features
+        done = 0
+        for idx, array, count in _iter_chunks_in_order(layer_id, chunks):
+            done += len(chunks[idx])
+            total_features += count
+            print(f"  Descargados {done}/{total} registros (chunk {idx}, features: {count})")
+            yield array
+
+    _write_feature_collection_stream(out_path, sources())
     print(f"  Guardado: {out_path} (features: {total_features})")
-    # Limpieza de temporales
-    try:
-        for idx in range(chunk_index):
-            chunk_path = os.path.join(layer_tmp_dir, f"chunk_{idx}.geojson")
-            if os.path.exists(chunk_path):
-                os.remove(chunk_path)
-        # eliminar carpeta si queda vacía
-        if os.path.isdir(layer_tmp_dir) and not os.listdir(layer_tmp_dir):
-            os.rmdir(layer_tmp_dir)
-    except Exception:
-        # no bloquear por limpieza
-        pass
+
+
+def _open_progress_db() -> sqlite3.Connection:
+    """Índice de chunks ya descargados (para --resume), compartido por todas las capas."""
+    os.makedirs(TMP_DIR, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(TMP_DIR, "progress.db"))
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < PROGRESS_DB_VERSION:
+        # Esquema anterior sin rangos de OID: sus filas no se pueden validar
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS completed")
+            conn.execute(f"PRAGMA user_version = {PROGRESS_DB_VERSION}")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS completed ("
+        " layer_id INTEGER NOT NULL,"
+        " chunk_idx INTEGER NOT NULL,"
+        " first_oid INTEGER NOT NULL,"
+        " last_oid INTEGER NOT NULL,"
+        " oid_count INTEGER NOT NULL,"
+        " feature_count INTEGER NOT NULL,"
+        " offset INTEGER NOT NULL,"
+        " length INTEGER NOT NULL,"
+        " PRIMARY KEY (layer_id, chunk_idx))"
+    )
+    return conn
+
+
+def _remove_legacy_chunk_dir(out_name: str):
+    """Borra outputs/tmp/<capa>/chunk_N.geojson del formato de reanudación anterior."""
+    legacy_dir = os.path.join(TMP_DIR, out_name)
+    if not os.path.isdir(legacy_dir):
+        return
+    print(f"  Borrando chunks temporales de formato anterior en {legacy_dir} (no reutilizables)")
+    shutil.rmtree(legacy_dir, ignore_errors=True)
+
+
+def _export_feature_layer_resumable(layer_id: int, out_name: str, chunks: List[List[int]], out_path: str):
+    """Variante reanudable (--resume).
+
+    Cada chunk descargado se agrega como una línea (array JSON de features) a
+    outputs/tmp/<capa>.ndjson y su posición queda registrada en progress.db.
+    Al relanzar se saltan los chunks ya registrados; al final se reescribe
+    todo a GeoJSON en una sola pasada secuencial.
+    """
+    _remove_legacy_chunk_dir(out_name)
+    with closing(_open_progress_db()) as conn:
+        data_path = os.path.join(TMP_DIR, f"{out_name}.ndjson")
+        data_size = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+        # Solo valen los chunks cuyos bytes están en el archivo de datos y cuyo
+        # rango de OIDs coincide con el actual (la capa pudo cambiar entre corridas)
+        completed: Dict[int, Tuple[int, int, int]] = {
+            idx: (count, offset, length)
+            for idx, first_oid, last_oid, oid_count, count, offset, length in conn.execute(
+                "SELECT chunk_idx, first_oid, last_oid, oid_count, feature_count, offset, length"
+                " FROM completed WHERE layer_id = ?",
+                (layer_id,),
+            )
+            if idx < len(chunks)
+            and (first_oid, last_oid, oid_count) == (chunks[idx][0], chunks[idx][-1], len(chunks[idx]))
+            and offset + length <= data_size
+        }
+        if not completed:
+            with conn:
+                conn.execute("DELETE FROM completed WHERE layer_id = ?", (layer_id,))
+
+        total = sum(len(c) for c in chunks)
+        written_features = sum(count for count, _, _ in completed.values())
+        done = sum(len(chunks[idx]) for idx in completed)
+        if completed:
+            print(f"  {len(completed)} chunks ya descargados, saltando.")
+            print(f"  Progreso estimado: {done}/{total} registros")
+        pending = [idx for idx in range(len(chunks)) if idx not in completed]
+
+        # Empezar de cero si no hay nada reutilizable; si no, agregar al final
+        with open(data_path, "ab" if completed else "wb") as data_file, \
+                ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+
+            def record(idx: int, array: bytes, count: int):
+                nonlocal written_features, done
+                offset = data_file.tell()
+                data_file.write(array)
+                data_file.write(b"\n")
+                data_file.flush()
+                os.fsync(data_file.fileno())
+                # Registrar el chunk recién cuando sus bytes ya están en disco
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO completed"
+                        " (layer_id, chunk_idx, first_oid, last_oid, oid_count, feature_count, offset, length)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (layer_id, idx, chunks[idx][0], chunks[idx][-1], len(chunks[idx]),
+                         count, offset, len(array)),
+                    )
+                completed[idx] = (count, offset, len(array))
+                written_features += count
+                done += len(chunks[idx])
+                print(f"  Descargados {done}/{total} registros (chunk {idx}, features: {count})")
+
+            # Como en _iter_chunks_in_order, a lo sumo 2 * MAX_WORKERS chunks en vuelo
+            todo = iter(pending)
+            in_flight: Dict[Future, int] = {}
+
+            def submit_more():
+                while len(in_flight) < 2 * MAX_WORKERS:
+                    idx = next(todo, None)
+                    if idx is None:
+                        return
+                    in_flight[executor.submit(_fetch_features_json, layer_id, chunks[idx])] = idx
+
+            submit_more()
+            try:
+                while in_flight:
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        idx = in_flight.pop(future)
+                        record(idx, *future.result())
+                    submit_more()
+            except BaseException:
+                # Error o Ctrl+C: no lanzar más descargas y guardar las que terminen,
+                # para que el próximo --resume no tenga que repetirlas
+                executor.shutdown(wait=False, cancel_futures=True)
+                for future, idx in in_flight.items():
+                    if future.cancelled():
+                        continue
+                    try:
+                        result = future.result()
+                    except Exception:
+                        continue
+                    record(idx, *result)
+                raise
+
+        # Unir chunks en un único GeoJSON final
+        print("  Uniendo chunks en archivo final...")
+        with open(data_path, "rb") as data_file:
+
+            def sources():
+                for idx in range(len(chunks)):
+                    _, offset, length = completed[idx]
+                    data_file.seek(offset)
+                    yield data_file, length
+
+            _write_feature_collection_stream(out_path, sources())
+        print(f"  Guardado: {out_path} (features: {written_features})")
+        # Limpieza de temporales
+        try:
+            with conn:
+                conn.execute("DELETE FROM completed WHERE layer_id = ?", (layer_id,))
+            os.remove(data_path)
+        except Exception:
+            # no bloquear por limpieza
+            pass
 
 
 def export_table(layer_id: int, out_name: str):
     print(f"Exportando tabla {layer_id} -> {out_name}.csv ...")
-    all_rows: List[Dict[str, Any]] = []
-    offset = 0
-    while True:
-        page = query_table_page(layer_id, offset)
-        rows = [f.get("attributes", {}) for f in page.get("features", [])]
-        all_rows.extend(rows)
-        got = len(rows)
-        print(f"  Descargados {offset + got} registros")
-        if got < CHUNK_SIZE:
-            break
-        offset += CHUNK_SIZE
+    fieldnames = get_field_names(layer_id)
+    oid_field = get_object_id_field(layer_id)
+
+    def pages():
+        # Paginar por OID: cada página es un seek por índice, no un offset
+        max_oid: Optional[int] = None
+        downloaded = 0
+        while True:
+            page = query_table_page(layer_id, oid_field, max_oid)
+            rows = [f.get("attributes", {}) for f in page.get("features", [])]
+            got = len(rows)
+            downloaded += got
+            print(f"  Descargados {downloaded} registros")
+            yield rows
+            if got < CHUNK_SIZE:
+                break
+            max_oid = max(row[oid_field] for row in rows)
+
     out_path = os.path.join(OUTPUT_DIR, f"{out_name}.csv")
-    write_csv(out_path, all_rows)
-    print(f"  Guardado: {out_path} (filas: {len(all_rows)})")
+    count = write_csv(out_path, fieldnames, pages())
+    print(f"  Guardado: {out_path} (filas: {count})")
 
 
 def main():
@@ -306,6 +560,11 @@ def main():
         help="Omitir capas potencialmente grandes (0 y 1)",
         action="store_true",
     )
+    parser.add_argument(
+        "--resume",
+        help="Guardar los chunks en outputs/tmp para poder reanudar una descarga interrumpida (más lento)",
+        action="store_true",
+    )
     args = parser.parse_args()
 
     selected_ids: List[int] = []
@@ -325,7 +584,7 @@ def main():
             continue
         try:
             if kind == "feature":
-                export_feature_layer(layer_id, name)
+                export_feature_layer(layer_id, name, resume=args.resume)
             elif kind == "table":
                 export_table(layer_id, name)
             else:
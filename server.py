@@ -1,13 +1,21 @@
 """
 Servidor Flask para el visor de Catastro SNIG.
 Sirve archivos estáticos y actúa como proxy para evitar CORS.
+
+En producción correr con gunicorn + gevent (ver render.yaml):
+    gunicorn -k gevent -w 4 --worker-connections 1000 server:app
+`python server.py` usa el servidor de desarrollo de Flask.
 """
 
 from flask import Flask, request, Response, send_from_directory
 from flask_cors import CORS
+from cachetools import TTLCache
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
 import logging
+import threading
 
 # Suprimir logs de Werkzeug para evitar problemas con PowerShell
 log = logging.getLogger('werkzeug')
@@ -25,6 +33,20 @@ OUTPUTS_DIR = os.path.join(os.path.dirname(__file__), 'outputs')
 GEOCODE_URL = "https://web.snig.gub.uy/arcgisserver/rest/services/LocatorUY/GeocodeServer"
 MAPSERVER_URL = "https://web.snig.gub.uy/arcgisserver/rest/services/Uruguay/SNIG_Catastro_Dos/MapServer"
 
+# Sesión compartida por todos los proxies: reutiliza conexiones TLS entre
+# peticiones y reintenta errores transitorios del upstream
+PROXY_SESSION = requests.Session()
+PROXY_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504], raise_on_status=False),
+))
+
+# Cache de búsquedas Nominatim (límite de 1 req/s): el autocompletado repite
+# mucho las mismas consultas. TTLCache no es thread-safe, de ahí el lock.
+NOMINATIM_CACHE = TTLCache(maxsize=4096, ttl=3600)
+NOMINATIM_CACHE_LOCK = threading.Lock()
+
 
 @app.route('/')
 def index():
@@ -64,8 +86,18 @@ def proxy_nominatim():
     }
     headers = {'User-Agent': 'CatastroVisor/1.0 (Windows)'}
     
+    key = (q, limit)
+    with NOMINATIM_CACHE_LOCK:
+        cached = NOMINATIM_CACHE.get(key)
+    if cached is not None:
+        return Response(cached, 200, mimetype='application/json')
+    
     try:
-        resp = requests.get(url, params=params, headers=headers, timeout=10)
+        # Respuestas chicas: se leen enteras para poder guardarlas en cache
+        resp = PROXY_SESSION.get(url, params=params, headers=headers, timeout=10)
+        if resp.status_code == 200:
+            with NOMINATIM_CACHE_LOCK:
+                NOMINATIM_CACHE[key] = resp.content
         return Response(resp.content, resp.status_code, mimetype='application/json')
     except Exception as e:
         return Response(f'{{"error": "{str(e)}"}}', 502, mimetype='application/json')
@@ -85,6 +117,15 @@ def proxy_mapserver(endpoint):
     return proxy_request(url)
 
 
+def _stream_upstream(resp):
+    """Reenvía el cuerpo upstream por bloques y libera la conexión al terminar"""
+    try:
+        for chunk in resp.iter_content(chunk_size=64 * 1024):
+            yield chunk
+    finally:
+        resp.close()
+
+
 def proxy_request(url):
     """Realiza la petición proxy y devuelve la respuesta"""
     try:
@@ -92,16 +133,16 @@ def proxy_request(url):
         params = request.args.to_dict()
         
         if request.method == 'POST':
-            resp = requests.post(url, params=params, data=request.form, timeout=30)
+            resp = PROXY_SESSION.post(url, params=params, data=request.form, timeout=30, stream=True)
         else:
-            resp = requests.get(url, params=params, timeout=30)
+            resp = PROXY_SESSION.get(url, params=params, timeout=30, stream=True)
         
         # Crear respuesta con los mismos headers relevantes
         excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
         headers = [(name, value) for name, value in resp.raw.headers.items()
                    if name.lower() not in excluded_headers]
         
-        response = Response(resp.content, resp.status_code, headers)
+        response = Response(_stream_upstream(resp), resp.status_code, headers)
         response.headers['Content-Type'] = resp.headers.get('Content-Type', 'application/json')
         
         return response